@@ -3,30 +3,120 @@ import os
 import time
 import random
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 try:
     import pyvista as pv
 except ImportError:
     pv = None
 
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:
+    numba = None
+
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+# El conteo en GPU solo compensa para nubes muy grandes (transferencia
+# incluida) y requiere cupy; se activa con el argumento --gpu.
+USAR_GPU = '--gpu' in sys.argv
+MIN_PUNTOS_GPU = 10_000_000
+
+# Número máximo de celdas para el que compensa un histograma denso
+# (por encima, el coste de memoria domina y se usa conteo disperso).
+MAX_CELDAS_DENSAS = 4_000_000
+
+if numba is not None:
+    @njit(parallel=True, fastmath=True)
+    def _contar_celdas(x, y, z, x_min, y_min, z_min, inv_celda, nx, ny, nz):
+        total = nx * ny * nz
+        parcial = np.zeros((numba.get_num_threads(), total), dtype=np.int64)
+        for i in prange(x.shape[0]):
+            ix = min(int((x[i] - x_min) * inv_celda), nx - 1)
+            iy = min(int((y[i] - y_min) * inv_celda), ny - 1)
+            iz = min(int((z[i] - z_min) * inv_celda), nz - 1)
+            parcial[numba.get_thread_id(), (ix * ny + iy) * nz + iz] += 1
+        return parcial.sum(axis=0)
+
+    @njit(fastmath=True)
+    def _separar_bits_escalar(v):
+        v &= 0xFFFF
+        v = (v | (v << 16)) & 0xFF0000FF
+        v = (v | (v << 8)) & 0xF00F00F00F00F
+        v = (v | (v << 4)) & 0xC30C30C30C30C3
+        v = (v | (v << 2)) & 0x249249249249249
+        return v
+
+    @njit(parallel=True, fastmath=True)
+    def _morton_kernel(x, y, z, x0, ex, y0, ey, z0, ez, maximo):
+        codigos = np.empty(x.shape[0], dtype=np.int64)
+        for i in prange(x.shape[0]):
+            qx = min(max(np.int64((x[i] - x0) * ex), 0), maximo)
+            qy = min(max(np.int64((y[i] - y0) * ey), 0), maximo)
+            qz = min(max(np.int64((z[i] - z0) * ez), 0), maximo)
+            codigos[i] = ((_separar_bits_escalar(qx) << 2) |
+                          (_separar_bits_escalar(qy) << 1) |
+                          _separar_bits_escalar(qz))
+        return codigos
+
+@dataclass
+class NubePuntos:
+    """
+    Nube de puntos en formato SoA: un array float32 contiguo por eje, de modo
+    que las operaciones sobre un solo eje recorren únicamente ese array en
+    lugar de cargar las tres coordenadas entrelazadas.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+
+    @classmethod
+    def desde_matriz(cls, matriz):
+        matriz = np.asarray(matriz, dtype=np.float32)
+        return cls(np.ascontiguousarray(matriz[:, 0]),
+                   np.ascontiguousarray(matriz[:, 1]),
+                   np.ascontiguousarray(matriz[:, 2]))
+
+    def como_matriz(self):
+        return np.column_stack((self.x, self.y, self.z))
+
+    def seleccionar(self, indices):
+        return NubePuntos(self.x[indices], self.y[indices], self.z[indices])
+
+    def limites(self):
+        return ((self.x.min(), self.y.min(), self.z.min()),
+                (self.x.max(), self.y.max(), self.z.max()))
+
+    def __len__(self):
+        return self.x.size
+
 class LectorPCD:
     """
     Lee un archivo PCD ASCII y extrae las coordenadas x, y, z.
     """
     @staticmethod
     def leer_pcd(ruta_archivo):
-        puntos = []
         with open(ruta_archivo, 'r') as f:
             for linea in f:
                 if linea.strip().lower() == 'data ascii':
                     break
-            for linea in f:
-                partes = linea.strip().split()
-                if len(partes) < 3:
-                    continue
-                x, y, z = map(float, partes[:3])
-                puntos.append((x, y, z))
-        return np.array(puntos)
+            try:
+                puntos = np.loadtxt(f, usecols=(0, 1, 2), dtype=np.float32, ndmin=2)
+            except ValueError:
+                # Archivo con líneas cortas o malformadas: filtrar primero
+                # y delegar igualmente el parseo numérico a NumPy.
+                f.seek(0)
+                for linea in f:
+                    if linea.strip().lower() == 'data ascii':
+                        break
+                validas = [linea for linea in f if len(linea.split()) >= 3]
+                puntos = np.loadtxt(validas, usecols=(0, 1, 2), dtype=np.float32, ndmin=2)
+        return NubePuntos.desde_matriz(puntos)
 
 class RejillaOcupacion:
     """
@@ -35,109 +125,309 @@ class RejillaOcupacion:
     def __init__(self, puntos, tam_celda):
         self.puntos = puntos
         self.tam_celda = tam_celda
-        self.x_minimo, self.y_minimo, self.z_minimo = np.min(puntos, axis=0)
-        self.x_maximo, self.y_maximo, self.z_maximo = np.max(puntos, axis=0)
-        nx = int(np.floor((self.x_maximo - self.x_minimo) / tam_celda)) + 1
-        ny = int(np.floor((self.y_maximo - self.y_minimo) / tam_celda)) + 1
-        nz = int(np.floor((self.z_maximo - self.z_minimo) / tam_celda)) + 1
-        self.total_celdas = nx * ny * nz
-        self.rejilla = {}
+        self.inv_tam_celda = 1.0 / tam_celda
+        (self.x_minimo, self.y_minimo, self.z_minimo), \
+            (self.x_maximo, self.y_maximo, self.z_maximo) = puntos.limites()
+        self.nx = int(np.floor((self.x_maximo - self.x_minimo) / tam_celda)) + 1
+        self.ny = int(np.floor((self.y_maximo - self.y_minimo) / tam_celda)) + 1
+        self.nz = int(np.floor((self.z_maximo - self.z_minimo) / tam_celda)) + 1
+        self.total_celdas = self.nx * self.ny * self.nz
         self._poblar()
 
+    def _poblar_gpu(self):
+        x = cp.asarray(self.puntos.x)
+        y = cp.asarray(self.puntos.y)
+        z = cp.asarray(self.puntos.z)
+        ix = cp.minimum(((x - self.x_minimo) * self.inv_tam_celda).astype(cp.int64), self.nx - 1)
+        iy = cp.minimum(((y - self.y_minimo) * self.inv_tam_celda).astype(cp.int64), self.ny - 1)
+        iz = cp.minimum(((z - self.z_minimo) * self.inv_tam_celda).astype(cp.int64), self.nz - 1)
+        lineales = (ix * self.ny + iy) * self.nz + iz
+        return cp.asnumpy(cp.bincount(lineales, minlength=self.total_celdas))
+
     def _poblar(self):
-        for x, y, z in self.puntos:
-            ix = int((x - self.x_minimo) // self.tam_celda)
-            iy = int((y - self.y_minimo) // self.tam_celda)
-            iz = int((z - self.z_minimo) // self.tam_celda)
-            clave = (ix, iy, iz)
-            self.rejilla[clave] = self.rejilla.get(clave, 0) + 1
+        # Cada punto cae exactamente en una celda: el total es conocido de
+        # antemano y no hace falta volver a sumar los conteos.
+        self._total_puntos = len(self.puntos)
+        if (cp is not None and USAR_GPU and len(self.puntos) >= MIN_PUNTOS_GPU
+                and self.total_celdas <= MAX_CELDAS_DENSAS):
+            conteos = self._poblar_gpu()
+            self.claves = np.flatnonzero(conteos)
+            self.conteos = conteos[self.claves]
+            return
+        if numba is not None and self.total_celdas <= MAX_CELDAS_DENSAS:
+            conteos = _contar_celdas(self.puntos.x, self.puntos.y, self.puntos.z,
+                                     self.x_minimo, self.y_minimo, self.z_minimo,
+                                     self.inv_tam_celda, self.nx, self.ny, self.nz)
+            self.claves = np.flatnonzero(conteos)
+            self.conteos = conteos[self.claves]
+            return
+        # Multiplicar por el inverso (truncar equivale a floor: los valores son >= 0)
+        # y acotar al último índice por si el redondeo se pasa en el borde superior.
+        ix = np.minimum(((self.puntos.x - self.x_minimo) * self.inv_tam_celda).astype(np.int64), self.nx - 1)
+        iy = np.minimum(((self.puntos.y - self.y_minimo) * self.inv_tam_celda).astype(np.int64), self.ny - 1)
+        iz = np.minimum(((self.puntos.z - self.z_minimo) * self.inv_tam_celda).astype(np.int64), self.nz - 1)
+        lineales = (ix * self.ny + iy) * self.nz + iz
+        if self.total_celdas <= MAX_CELDAS_DENSAS:
+            conteos = np.bincount(lineales, minlength=self.total_celdas)
+            self.claves = np.flatnonzero(conteos)
+            self.conteos = conteos[self.claves]
+        else:
+            self.claves, self.conteos = np.unique(lineales, return_counts=True)
 
     def estadisticas_celdas(self):
-        ocupadas = len(self.rejilla)
+        ocupadas = self.claves.size
         vacias = self.total_celdas - ocupadas
-        promedio_puntos = np.mean(list(self.rejilla.values())) if ocupadas else 0
+        promedio_puntos = self._total_puntos / ocupadas if ocupadas else 0
         return {'total_celdas': self.total_celdas, 'ocupadas': ocupadas, 'vacias': vacias, 'promedio_puntos': promedio_puntos}
 
 class NodoOctree:
     """
     Octree adaptable: subdivide nodos con > maximo_puntos hasta que el tamaño <= tam_minimo.
+
+    Los puntos se ordenan una sola vez por código Morton antes de construir la
+    raíz (ver construir); cada nodo es entonces un rango [inicio, fin) sobre
+    ese orden compartido y subdividir se reduce a búsquedas binarias sobre los
+    códigos, sin máscaras booleanas ni copias por octante.
     """
-    def __init__(self, puntos, limites, tam_minimo, maximo_puntos):
-        self.puntos = puntos
+    def __init__(self, codigos, puntos, inicio, fin, nivel, base, limites, tam_minimo, maximo_puntos):
+        self.codigos = codigos
+        self._completos = puntos
+        self.inicio = inicio
+        self.fin = fin
+        self.n = fin - inicio
+        self.nivel = nivel
+        self.base = base
         self.limites = limites
         self.tam_minimo = tam_minimo
         self.maximo_puntos = maximo_puntos
         self.hijos = []
         self._subdividir_o_hoja()
 
+    @property
+    def puntos(self):
+        """Vista contigua sobre la nube permutada por Morton, sin copia."""
+        return self._completos.seleccionar(slice(self.inicio, self.fin))
+
+    @classmethod
+    def construir(cls, puntos, limites, tam_minimo, maximo_puntos):
+        codigos = _codigos_morton(puntos, limites, NIVEL_MAXIMO_MORTON)
+        orden = np.argsort(codigos)
+        return cls(codigos[orden], puntos.seleccionar(orden), 0, len(puntos), 0, np.int64(0),
+                   limites, tam_minimo, maximo_puntos)
+
     def _subdividir_o_hoja(self):
         tam = np.subtract(self.limites[1], self.limites[0])
-        if len(self.puntos) > self.maximo_puntos and np.max(tam) > self.tam_minimo:
+        if (self.n > self.maximo_puntos and np.max(tam) > self.tam_minimo
+                and self.nivel < NIVEL_MAXIMO_MORTON):
             self._subdividir()
 
     def _subdividir(self):
         (x0, y0, z0), (x1, y1, z1) = self.limites
         mx, my, mz = (x0 + x1) / 2, (y0 + y1) / 2, (z0 + z1) / 2
+        paso = np.int64(1) << np.int64(3 * (NIVEL_MAXIMO_MORTON - self.nivel - 1))
+        cortes = self.base + np.arange(8, dtype=np.int64) * paso
+        # Una sola búsqueda binaria vectorizada localiza los 8 rangos hijo.
+        pos = np.append(self.inicio + np.searchsorted(self.codigos[self.inicio:self.fin], cortes),
+                        self.fin)
+        hijo = 0
         for dx in [(x0, mx), (mx, x1)]:
             for dy in [(y0, my), (my, y1)]:
                 for dz in [(z0, mz), (mz, z1)]:
                     sub_limites = ((dx[0], dy[0], dz[0]), (dx[1], dy[1], dz[1]))
-                    mascara = (
-                        (self.puntos[:,0] >= sub_limites[0][0]) & (self.puntos[:,0] < sub_limites[1][0]) &
-                        (self.puntos[:,1] >= sub_limites[0][1]) & (self.puntos[:,1] < sub_limites[1][1]) &
-                        (self.puntos[:,2] >= sub_limites[0][2]) & (self.puntos[:,2] < sub_limites[1][2])
-                    )
-                    puntos_hijo = self.puntos[mascara]
-                    self.hijos.append(NodoOctree(puntos_hijo, sub_limites, self.tam_minimo, self.maximo_puntos))
+                    a, b = pos[hijo], pos[hijo + 1]
+                    # Los octantes vacíos no aportan nada al visor: ni se
+                    # asigna nodo ni se recorre su subárbol.
+                    if b > a:
+                        self.hijos.append(NodoOctree(self.codigos, self._completos, a, b,
+                                                     self.nivel + 1, cortes[hijo], sub_limites,
+                                                     self.tam_minimo, self.maximo_puntos))
+                    hijo += 1
 
     def recopilar_estadisticas(self):
-        def recursivo(nodo):
-            estad = {'nodos': 1, 'hojas': 0, 'internos': 0, 'hojas_ocupadas': 0,
-                     'hojas_vacias': 0, 'suma_puntos': 0}
-            if not nodo.hijos:
-                estad['hojas'] = 1
-                cnt = len(nodo.puntos)
-                if cnt > 0:
-                    estad['hojas_ocupadas'] = 1
-                    estad['suma_puntos'] = cnt
-                else:
-                    estad['hojas_vacias'] = 1
+        nodos = hojas = internos = ocupadas = vacias = suma = 0
+        pila = [self]
+        while pila:
+            nodo = pila.pop()
+            nodos += 1
+            if nodo.hijos:
+                internos += 1
+                pila.extend(nodo.hijos)
             else:
-                estad['internos'] = 1
-                for h in nodo.hijos:
-                    sub = recursivo(h)
-                    for k in estad:
-                        estad[k] += sub[k]
-            return estad
-        raw = recursivo(self)
-        prom_hojas = raw['suma_puntos'] / raw['hojas_ocupadas'] if raw['hojas_ocupadas'] else 0
-        return {'total_nodos': raw['nodos'], 'hojas': raw['hojas'], 'internos': raw['internos'],
-                'hojas_ocupadas': raw['hojas_ocupadas'], 'hojas_vacias': raw['hojas_vacias'], 'promedio_puntos': prom_hojas}
+                hojas += 1
+                if nodo.n > 0:
+                    ocupadas += 1
+                    suma += nodo.n
+                else:
+                    vacias += 1
+        prom_hojas = suma / ocupadas if ocupadas else 0
+        return {'total_nodos': nodos, 'hojas': hojas, 'internos': internos,
+                'hojas_ocupadas': ocupadas, 'hojas_vacias': vacias, 'promedio_puntos': prom_hojas}
 
     def obtener_nodos_hoja(self):
-        if not self.hijos:
-            return [self]
         hojas = []
-        for h in self.hijos:
-            hojas.extend(h.obtener_nodos_hoja())
+        pila = [self]
+        while pila:
+            nodo = pila.pop()
+            if nodo.hijos:
+                pila.extend(reversed(nodo.hijos))
+            else:
+                hojas.append(nodo)
         return hojas
 
+# 16 bits por eje: 65k celdas por dimensión, resolución muy superior a
+# cualquier tam_minimo realista, y los códigos (3 x 16 = 48 bits) caben
+# holgadamente en un int64 con una etapa menos de dispersión de bits.
+NIVEL_MAXIMO_MORTON = 16
+
+def _separar_bits(v):
+    """Dispersa los 16 bits bajos de cada entero dejando dos ceros entre bits."""
+    v = v & np.int64(0xFFFF)
+    v = (v | (v << 16)) & np.int64(0xFF0000FF)
+    v = (v | (v << 8)) & np.int64(0xF00F00F00F00F)
+    v = (v | (v << 4)) & np.int64(0xC30C30C30C30C3)
+    v = (v | (v << 2)) & np.int64(0x249249249249249)
+    return v
+
+def _compactar_bits(v):
+    """Operación inversa de _separar_bits: recupera los 16 bits de un eje."""
+    v = v & np.int64(0x249249249249249)
+    v = (v | (v >> 2)) & np.int64(0xC30C30C30C30C3)
+    v = (v | (v >> 4)) & np.int64(0xF00F00F00F00F)
+    v = (v | (v >> 8)) & np.int64(0xFF0000FF)
+    v = (v | (v >> 16)) & np.int64(0xFFFF)
+    return v
+
+def _cuantizar_eje(valores, minimo, maximo, nivel):
+    q = ((valores - np.float32(minimo)) * _escala_eje(minimo, maximo, nivel)).astype(np.int64)
+    np.clip(q, 0, (1 << nivel) - 1, out=q)
+    return q
+
+def _escala_eje(minimo, maximo, nivel):
+    return (1 << nivel) / max(maximo - minimo, 1e-12)
+
+def _codigos_morton(nube, limites, nivel):
+    """Cuantiza cada eje a [0, 2^nivel) y entrelaza los bits en un código Morton."""
+    (x0, y0, z0), (x1, y1, z1) = limites
+    if numba is not None:
+        # Kernel fusionado: cuantiza y entrelaza en una sola pasada compilada,
+        # sin los arrays temporales de la versión vectorizada.
+        return _morton_kernel(nube.x, nube.y, nube.z,
+                              np.float32(x0), _escala_eje(x0, x1, nivel),
+                              np.float32(y0), _escala_eje(y0, y1, nivel),
+                              np.float32(z0), _escala_eje(z0, z1, nivel),
+                              (1 << nivel) - 1)
+    qx = _cuantizar_eje(nube.x, x0, x1, nivel)
+    qy = _cuantizar_eje(nube.y, y0, y1, nivel)
+    qz = _cuantizar_eje(nube.z, z0, z1, nivel)
+    return (_separar_bits(qx) << 2) | (_separar_bits(qy) << 1) | _separar_bits(qz)
+
+class NodoOctreeLineal:
+    """
+    Octree lineal por códigos Morton: cuantiza los puntos, ordena sus códigos
+    una sola vez y representa cada hoja como un rango [inicio, fin) sobre ese
+    orden, sin asignar un objeto Python por nodo.
+    """
+    def __init__(self, puntos, limites, tam_minimo, maximo_puntos):
+        self.limites = limites
+        self.tam_minimo = tam_minimo
+        self.maximo_puntos = maximo_puntos
+        self.nivel_maximo = NIVEL_MAXIMO_MORTON
+        codigos = _codigos_morton(puntos, limites, self.nivel_maximo)
+        self.orden = np.argsort(codigos)
+        self.codigos = codigos[self.orden]
+        self._construir()
+
+    def _construir(self):
+        lado_mayor = float(np.max(np.subtract(self.limites[1], self.limites[0])))
+        hojas_inicio, hojas_fin = [], []
+        hojas_base, hojas_nivel = [], []
+        self.internos = 0
+        pila = [(0, self.codigos.size, 0, np.int64(0))]
+        while pila:
+            inicio, fin, nivel, base = pila.pop()
+            if (fin - inicio > self.maximo_puntos and nivel < self.nivel_maximo
+                    and lado_mayor / (1 << nivel) > self.tam_minimo):
+                self.internos += 1
+                paso = np.int64(1) << np.int64(3 * (self.nivel_maximo - nivel - 1))
+                # Solo 8 cortes: el límite superior del último hijo es
+                # directamente `fin`, el final del rango del propio nodo.
+                cortes = base + np.arange(8, dtype=np.int64) * paso
+                pos = list(inicio + np.searchsorted(self.codigos[inicio:fin], cortes)) + [fin]
+                for i in range(8):
+                    pila.append((pos[i], pos[i + 1], nivel + 1, cortes[i]))
+            else:
+                hojas_inicio.append(inicio)
+                hojas_fin.append(fin)
+                hojas_base.append(base)
+                hojas_nivel.append(nivel)
+        self.hojas_inicio = np.array(hojas_inicio, dtype=np.int64)
+        self.hojas_fin = np.array(hojas_fin, dtype=np.int64)
+        self.hojas_n = (self.hojas_fin - self.hojas_inicio).astype(np.int32)
+        self.hojas_limites = self._limites_hojas(np.array(hojas_base, dtype=np.int64),
+                                                 np.array(hojas_nivel, dtype=np.int64))
+
+    def _limites_hojas(self, bases, niveles):
+        origen = np.asarray(self.limites[0], dtype=np.float64)
+        tam = np.maximum(np.subtract(self.limites[1], self.limites[0]), 1e-12)
+        q = np.stack([_compactar_bits(bases >> 2),
+                      _compactar_bits(bases >> 1),
+                      _compactar_bits(bases)], axis=1)
+        minimos = origen + q * (tam / (1 << self.nivel_maximo))
+        maximos = minimos + tam / (1 << niveles)[:, None]
+        return np.stack([minimos, maximos], axis=1)
+
+    def recopilar_estadisticas(self):
+        conteos = self.hojas_n
+        hojas = conteos.size
+        ocupadas = int(np.count_nonzero(conteos))
+        suma = int(conteos.sum())
+        prom_hojas = suma / ocupadas if ocupadas else 0
+        return {'total_nodos': self.internos + hojas, 'hojas': hojas, 'internos': self.internos,
+                'hojas_ocupadas': ocupadas, 'hojas_vacias': hojas - ocupadas, 'promedio_puntos': prom_hojas}
+
+    def obtener_nodos_hoja(self):
+        """Devuelve (limites, conteos) de las hojas como arrays paralelos."""
+        return self.hojas_limites, self.hojas_n
+
+def _deduplicar(nube):
+    """
+    Elimina puntos duplicados con np.unique sobre una clave entera por punto
+    (coordenadas cuantizadas a 1e-6 y mezcladas en un int64), evitando la
+    comparación lexicográfica fila a fila de np.unique(axis=0).
+    """
+    qx = np.round((nube.x - nube.x.min()) * 1e6).astype(np.int64)
+    qy = np.round((nube.y - nube.y.min()) * 1e6).astype(np.int64)
+    qz = np.round((nube.z - nube.z.min()) * 1e6).astype(np.int64)
+    clave = (qx << 42) ^ (qy << 21) ^ qz
+    _, indices = np.unique(clave, return_index=True)
+    return nube.seleccionar(indices)
+
 PARAMETROS = [
     {'tam_celda': 1.0, 'tam_minimo': 1.0, 'maximo_puntos': 100},
     {'tam_celda': 0.5, 'tam_minimo': 0.5, 'maximo_puntos': 100},
     {'tam_celda': 3.0, 'tam_minimo': 1.0, 'maximo_puntos': 300},
 ]
 
+def _ejecutar_configuracion(pts, limites, p):
+    g = RejillaOcupacion(pts, p['tam_celda']).estadisticas_celdas()
+    o = NodoOctreeLineal(pts, limites, p['tam_minimo'], p['maximo_puntos']).recopilar_estadisticas()
+    return (p, g, o)
+
 def comparar_archivo(ruta):
     pts = LectorPCD.leer_pcd(ruta)
-    pts = np.unique(pts, axis=0)
-    limites = ((pts[:,0].min(), pts[:,1].min(), pts[:,2].min()),
-               (pts[:,0].max(), pts[:,1].max(), pts[:,2].max()))
-    resultados = []
-    for p in PARAMETROS:
-        g = RejillaOcupacion(pts, p['tam_celda']).estadisticas_celdas()
-        o = NodoOctree(pts, limites, p['tam_minimo'], p['maximo_puntos']).recopilar_estadisticas()
-        resultados.append((p, g, o))
+    pts = _deduplicar(pts)
+    limites = pts.limites()
+    # Los kernels paralelos de numba deben ejecutarse desde el hilo principal
+    # (la capa TBB se queda bloqueada al salir del intérprete si hubo regiones
+    # paralelas en otros hilos) y ya reparten cada configuración entre todos
+    # los núcleos, así que con numba el barrido va en serie.
+    if numba is not None:
+        return [_ejecutar_configuracion(pts, limites, p) for p in PARAMETROS]
+    # Sin numba las configuraciones son NumPy puro, que libera el GIL en sus
+    # bucles internos: los hilos sí escalan con los núcleos.
+    with ThreadPoolExecutor(max_workers=len(PARAMETROS)) as ejecutor:
+        futuros = [ejecutor.submit(_ejecutar_configuracion, pts, limites, p) for p in PARAMETROS]
+        resultados = [f.result() for f in futuros]
     return resultados
 
 def formatear_comparacion(nombre, datos):
@@ -161,16 +451,26 @@ def formatear_comparacion(nombre, datos):
             f"  hojas_vacias: {o['hojas_vacias']}",
             f"  promedio_puntos: {o['promedio_puntos']:.2f}"
         ])
-    L = max(len(c) for c in columnas)
     W = max(max(len(x) for x in c) for c in columnas) + 2
     separador = ' | '
     borde = '-' * (len(columnas)*W + (len(columnas)-1)*len(separador))
-    print(borde)
-    for i in range(L):
-        linea = ''.join(columnas[j][i].ljust(W) + (separador if j < len(columnas)-1 else '')
-                        for j in range(len(columnas)))
-        print(linea)
-    print(borde)
+    formateadas = [[celda.ljust(W) for celda in c] for c in columnas]
+    filas = '\n'.join(separador.join(fila) for fila in zip(*formateadas))
+    print(borde, filas, borde, sep='\n')
+
+# Esquinas de una caja unitaria (bits x, y, z) y las 12 aristas que unen
+# esquinas que difieren en un solo bit.
+_ESQUINAS_CAJA = np.array([[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)], dtype=np.float64)
+_ARISTAS_CAJA = np.array([(i, i | (1 << k)) for k in range(3) for i in range(8) if not i & (1 << k)])
+
+def _malla_cajas(minimos, maximos):
+    """Construye una sola malla de líneas con las 12 aristas de cada caja."""
+    k = minimos.shape[0]
+    vertices = (minimos[:, None, :] +
+                _ESQUINAS_CAJA[None, :, :] * (maximos - minimos)[:, None, :]).reshape(-1, 3)
+    aristas = (_ARISTAS_CAJA[None, :, :] + 8 * np.arange(k)[:, None, None]).reshape(-1, 2)
+    lineas = np.column_stack([np.full(aristas.shape[0], 2), aristas]).ravel()
+    return pv.PolyData(vertices, lines=lineas)
 
 def visualizar_archivo(ruta):
     if pv is None:
@@ -178,42 +478,32 @@ def visualizar_archivo(ruta):
         sys.exit(1)
     pts = LectorPCD.leer_pcd(ruta)
     print(f"Cargados {len(pts)} puntos.")
-    limites = ((pts[:,0].min(), pts[:,1].min(), pts[:,2].min()),
-               (pts[:,0].max(), pts[:,1].max(), pts[:,2].max()))
-    dims = np.ptp(pts, axis=0)
-    max_dim = max(dims)
+    limites = pts.limites()
+    max_dim = max(np.subtract(limites[1], limites[0]))
     tam_minimo = max_dim / 50.0
-    total_puntos = pts.shape[0]
+    total_puntos = len(pts)
     maximo_puntos = max(int(total_puntos / 1000), 10)
     max_hojas = min(int(total_puntos / 10), 10000)
     print(f"Parámetros auto -> tam_minimo: {tam_minimo:.3f}, maximo_puntos: {maximo_puntos}, max_hojas: {max_hojas}")
     print("Construyendo Octree...")
     t0 = time.time()
-    octree = NodoOctree(pts, limites, tam_minimo, maximo_puntos)
+    octree = NodoOctree.construir(pts, limites, tam_minimo, maximo_puntos)
     print(f"Construido en {time.time()-t0:.2f}s")
     hojas = octree.obtener_nodos_hoja()
-    hojas_ocupadas = [n for n in hojas if len(n.puntos) > 0]
+    hojas_ocupadas = [h for h in hojas if h.n > 0]
     T = len(hojas_ocupadas)
     print(f"Hojas ocupadas: {T}")
+    limites_cajas = np.array([h.limites for h in hojas_ocupadas])
     if max_hojas > 0 and T > max_hojas:
         print(f"Seleccionando {max_hojas} hojas representativas...")
-        centroides = np.array([
-            ((b[0][0]+b[1][0])/2, (b[0][1]+b[1][1])/2, (b[0][2]+b[1][2])/2)
-            for b in [n.limites for n in hojas_ocupadas]
-        ])
-        paso = T / max_hojas
-        seleccionadas = [hojas_ocupadas[int(i*paso)] for i in range(max_hojas)]
+        limites_cajas = limites_cajas[np.linspace(0, T - 1, max_hojas, dtype=np.int64)]
     else:
-        seleccionadas = hojas_ocupadas
         print(f"Dibujando todas las {T} hojas.")
     pl = pv.Plotter()
-    pl.add_mesh(pv.PolyData(pts), color='black', point_size=2)
-    for nodo in seleccionadas:
-        (x0, y0, z0), (x1, y1, z1) = nodo.limites
-        centro = ((x0+x1)/2, (y0+y1)/2, (z0+z1)/2)
-        longitudes = (x1-x0, y1-y0, z1-z0)
-        cubo = pv.Cube(center=centro, x_length=longitudes[0], y_length=longitudes[1], z_length=longitudes[2])
-        pl.add_mesh(cubo, style='wireframe', color='green', opacity=0.4)
+    # La nube permutada del octree deja los puntos de cada hoja contiguos.
+    pl.add_mesh(pv.PolyData(octree.puntos.como_matriz()), color='black', point_size=2)
+    pl.add_mesh(_malla_cajas(limites_cajas[:, 0], limites_cajas[:, 1]),
+                style='wireframe', color='green', opacity=0.4)
     pl.add_axes()
     pl.show()
 